@@ -1,711 +1,1236 @@
-import os
-import re
-import time
-import shutil
-from dataclasses import dataclass
-from typing import List, Optional
-from urllib.parse import quote_plus, urlsplit, urlunsplit, parse_qsl, urlencode
-
-from playwright.sync_api import (
-    sync_playwright,
-    BrowserContext,
-    Page,
-    TimeoutError as PWTimeoutError,
-)
-
-# -------------------------
-# Настройки
-# -------------------------
-
-YANDEX_PATH = os.path.expandvars(r"%LOCALAPPDATA%\Yandex\YandexBrowser\Application\browser.exe")
-
-PROFILE_DIR = os.path.abspath("./browser_profile_pw")  # persistent-профиль (логин, куки)
-FALLBACK_PROFILE_DIR = os.path.abspath("./browser_profile_pw_fallback")
-
-HEADLESS = False
-ITEMS_ON_PAGE = 20
-MAX_LINKS_SCAN = 260
-
-
-# -------------------------
-# Модели
-# -------------------------
-
-@dataclass
-class Vacancy:
-    title: str
-    url: str
-    snippet: str
-
-
-# -------------------------
-# Текст/URL утилиты
-# -------------------------
-
-def norm_text(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "")).strip()
-
-
-def set_query_param(url: str, key: str, value: str) -> str:
-    parts = urlsplit(url)
-    q = dict(parse_qsl(parts.query, keep_blank_values=True))
-    q[key] = value
-    new_query = urlencode(q, doseq=True)
-    return urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, parts.fragment))
-
-
-def build_search_url(
-    query: str,
-    page: int = 0,
-    area: Optional[int] = None,
-    experience: Optional[str] = None,
-    remote: Optional[bool] = None,
-    salary: Optional[int] = None,
-    only_with_salary: Optional[bool] = None,
-) -> str:
-    base = f"https://hh.ru/search/vacancy?text={quote_plus(query)}&items_on_page={ITEMS_ON_PAGE}&no_magic=true"
-
-    if area is not None:
-        base = set_query_param(base, "area", str(area))
-
-    if experience:
-        base = set_query_param(base, "experience", experience)
-
-    if remote:
-        base = set_query_param(base, "schedule", "remote")
-
-    if salary is not None:
-        base = set_query_param(base, "salary", str(salary))
-
-    if only_with_salary:
-        base = set_query_param(base, "only_with_salary", "true")
-
-    base = set_query_param(base, "page", str(page))
-    return base
-
-
-def wait_settle(page: Page, timeout_ms: int = 20000) -> None:
-    try:
-        page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
-    except Exception:
-        pass
-    page.wait_for_timeout(500)
-
-
-def safe_click(page: Page, selectors: List[str], timeout: int = 9000) -> bool:
-    for sel in selectors:
-        try:
-            page.locator(sel).first.click(timeout=timeout)
-            return True
-        except Exception:
-            continue
-    return False
-
-
-def safe_fill(page: Page, selectors: List[str], value: str, timeout: int = 9000) -> bool:
-    for sel in selectors:
-        try:
-            loc = page.locator(sel).first
-            loc.click(timeout=timeout)
-            loc.fill(value, timeout=timeout)
-            return True
-        except Exception:
-            continue
-    return False
-
-
-def ensure_logged_in_hint(page: Page) -> None:
-    # Подсказка: если видим "Войти" — вероятно, не авторизованы
-    try:
-        if page.locator("text=Войти").first.is_visible(timeout=1200):
-            print("\n[info] Похоже, вы не авторизованы на hh.ru.")
-            print("[info] Войдите вручную в открывшемся браузере и продолжайте работу.\n")
-    except Exception:
-        pass
-
-
-def ensure_dir_clean(path: str) -> None:
-    if os.path.exists(path):
-        shutil.rmtree(path, ignore_errors=True)
-    os.makedirs(path, exist_ok=True)
-
-
-# -------------------------
-# Playwright запуск
-# -------------------------
-
-def _launch_once(pw, user_data_dir: str, use_yandex: bool) -> BrowserContext:
-    kwargs = dict(
-        user_data_dir=user_data_dir,
-        headless=HEADLESS,
-        viewport={"width": 1280, "height": 900},
-        timeout=180_000,
-        args=[
-            "--disable-blink-features=AutomationControlled",
-            "--disable-gpu",
-            "--disable-software-rasterizer",
-            "--no-first-run",
-            "--no-default-browser-check",
-        ],
-        ignore_default_args=["--enable-automation"],
-    )
-
-    if use_yandex and os.path.exists(YANDEX_PATH):
-        kwargs["executable_path"] = YANDEX_PATH
-
-    return pw.chromium.launch_persistent_context(**kwargs)
-
-
-def launch_context_robust(pw) -> BrowserContext:
-    """
-    Порядок попыток:
-      1) Chromium (Playwright) с основным профилем
-      2) Chromium (Playwright) с чистым fallback-профилем
-      3) Yandex с чистым fallback-профилем (если установлен)
-    """
-    attempts = [
-        ("Chromium main profile", PROFILE_DIR, False, False),
-        ("Chromium fresh fallback", FALLBACK_PROFILE_DIR, False, True),
-        ("Yandex fresh fallback", FALLBACK_PROFILE_DIR, True, True),
-    ]
-
-    last_exc: Optional[Exception] = None
-
-    for name, profile_dir, use_yandex, fresh in attempts:
-        try:
-            if fresh:
-                ensure_dir_clean(profile_dir)
-            else:
-                os.makedirs(profile_dir, exist_ok=True)
-
-            print(f"[info] Launch attempt: {name} | profile={profile_dir}")
-            ctx = _launch_once(pw, user_data_dir=profile_dir, use_yandex=use_yandex)
-            print("[ok] Browser context launched.")
-            return ctx
-        except Exception as e:
-            last_exc = e
-            print(f"[warn] Launch failed: {name}\n       {type(e).__name__}: {e}\n")
-            time.sleep(1.0)
-
-    raise RuntimeError(f"Не удалось запустить браузер ни одним способом. Последняя ошибка: {last_exc}")
-
-
-# -------------------------
-# HH логика
-# -------------------------
-
-def collect_vacancies_from_search(page: Page) -> List[Vacancy]:
-    vacancies: List[Vacancy] = []
-
-    try:
-        page.wait_for_selector("a[href*='/vacancy/']", timeout=20000)
-    except Exception:
-        return vacancies
-
-    anchors = page.locator("a[href*='/vacancy/']")
-    n = min(anchors.count(), MAX_LINKS_SCAN)
-
-    seen = set()
-    for i in range(n):
-        try:
-            a = anchors.nth(i)
-            href = a.get_attribute("href") or ""
-            if "/vacancy/" not in href:
-                continue
-
-            if href.startswith("/"):
-                href = "https://hh.ru" + href
-
-            href = href.split("?")[0]
-            if href in seen:
-                continue
-            seen.add(href)
-
-            title = norm_text(a.inner_text(timeout=800))
-            if not title:
-                continue
-
-            snippet = ""
-            try:
-                card = a.locator("xpath=ancestor::*[self::div or self::article][1]")
-                snippet = norm_text(card.inner_text(timeout=800))[:450]
-            except Exception:
-                pass
-
-            vacancies.append(Vacancy(title=title, url=href, snippet=snippet))
-
-            if len(vacancies) >= ITEMS_ON_PAGE:
-                break
-        except Exception:
-            continue
-
-    return vacancies
-
-
-def open_vacancy(page: Page, v: Vacancy) -> None:
-    page.goto(v.url, wait_until="domcontentloaded", timeout=60000)
-    wait_settle(page)
-    ensure_logged_in_hint(page)
-
-
-def cover_letter_6_8_lines() -> str:
-    lines = [
-        "Здравствуйте!",
-        "Интересна позиция Python-разработчика: пишу production-код и довожу задачи до результата.",
-        "Опыт: backend/API, интеграции, фоновые задачи, БД, оптимизация и отладка.",
-        "Работаю с Django/FastAPI, уделяю внимание качеству, тестированию и логированию.",
-        "При необходимости подключаю LLM-интеграции (RAG, инструменты, оценка качества).",
-        "Готов быстро пройти интервью и выполнить тестовое задание.",
-        "Спасибо! Буду рад обсудить детали.",
-    ]
-    return "\n".join(lines)
-
-
-def respond_to_vacancy(page: Page, v: Vacancy, letter: str, submit: bool) -> bool:
-    open_vacancy(page, v)
-
-    clicked = safe_click(
-        page,
-        selectors=[
-            "text=Откликнуться",
-            "button:has-text('Откликнуться')",
-            "[data-qa*='vacancy-response']",
-        ],
-        timeout=12000,
-    )
-
-    if not clicked:
-        print(f"[warn] Не нашёл кнопку «Откликнуться»: {v.url}")
-        return False
-
-    wait_settle(page)
-
-    filled = safe_fill(
-        page,
-        selectors=[
-            "[data-qa*='vacancy-response-letter'] textarea",
-            "[data-qa*='cover-letter'] textarea",
-            "textarea",
-        ],
-        value=letter,
-        timeout=12000,
-    )
-
-    if not filled:
-        try:
-            ed = page.locator("[contenteditable='true']").first
-            ed.click(timeout=6000)
-            ed.fill(letter, timeout=6000)
-            filled = True
-        except Exception:
-            pass
-
-    if not filled:
-        print(f"[warn] Не удалось вставить письмо. Оставил страницу открытой: {v.url}")
-        return True
-
-    if not submit:
-        print(f"[ok] Письмо вставлено (НЕ отправлено). Проверьте и отправьте вручную: {v.url}")
-        return True
-
-    sent = safe_click(
-        page,
-        selectors=[
-            "button:has-text('Отправить')",
-            "text=Отправить",
-        ],
-        timeout=9000,
-    )
-
-    if sent:
-        print(f"[ok] Отклик отправлен: {v.url}")
-        return True
-
-    print(f"[warn] Не нашёл финальную кнопку отправки. Проверьте вручную: {v.url}")
-    return False
-
-
-# -------------------------
-# "AI" парсер задачи -> query и фильтры
-# -------------------------
-
-def _extract_int(text: str) -> Optional[int]:
-    m = re.search(r"\b(\d{1,2})\b", text)
-    if not m:
-        return None
-    try:
-        return int(m.group(1))
-    except Exception:
-        return None
-
-
-def ai_interpret_user_goal(user_text: str) -> dict:
-    t = norm_text(user_text or "")
-    tl = t.lower()
-
-    want_n = _extract_int(tl)
-
-    # area: Москва=1, СПб=2, РФ=113
-    area = None
-    if "моск" in tl:
-        area = 1
-    elif "питер" in tl or "спб" in tl or "санкт-петер" in tl:
-        area = 2
-    elif "росси" in tl or "рф" in tl:
-        area = 113
-
-    # опыт
-    experience = None
-    if any(x in tl for x in ["без опыта", "стажер", "стажёр", "intern", "junior", "джун"]):
-        experience = "noExperience"
-    elif any(x in tl for x in ["middle", "мидл", "мид"]):
-        experience = "between1And3"
-    elif any(x in tl for x in ["senior", "сеньор", "синьор", "lead", "лид"]):
-        experience = "between3And6"
-
-    if re.search(r"\b1\s*[-–]\s*3\b", tl):
-        experience = "between1And3"
-    if re.search(r"\b3\s*[-–]\s*6\b", tl):
-        experience = "between3And6"
-    if re.search(r"\b6\+\b|\bболее\s*6\b", tl):
-        experience = "moreThan6"
-
-    # удалёнка
-    remote = any(x in tl for x in ["удален", "удалён", "remote", "из дома"])
-
-    # зарплата
-    salary = None
-    only_with_salary = False
-    m_sal = re.search(r"(?:от\s*)?(\d{2,3})\s*(?:к|k)\b", tl)  # "200к"
-    if m_sal:
-        salary = int(m_sal.group(1)) * 1000
-    else:
-        m_sal2 = re.search(r"(?:от\s*)?(\d{5,6})\b", tl)  # "150000"
-        if m_sal2:
-            salary = int(m_sal2.group(1))
-
-    if salary is not None and any(x in tl for x in ["только с зп", "только с зарплат", "с зарплатой", "only_with_salary"]):
-        only_with_salary = True
-
-    # запрос (text)
-    role_bits = []
-    if "python" in tl or "питон" in tl:
-        role_bits.append("Python")
-    if "backend" in tl or "бэкенд" in tl or "бекенд" in tl:
-        role_bits.append("backend")
-    if "django" in tl:
-        role_bits.append("Django")
-    if "fastapi" in tl:
-        role_bits.append("FastAPI")
-    if "asyncio" in tl:
-        role_bits.append("asyncio")
-
-    if role_bits:
-        query = " ".join(dict.fromkeys(role_bits)) + " разработчик"
-    else:
-        query = t
-
-    query = re.sub(
-        r"\b(открой|открыть|hh|hh\.ru|хх|хх\.ру|найди|найти|покажи|ваканси[яи]|с фильтрами|по фильтрам)\b",
-        " ",
-        query,
-        flags=re.I,
-    )
-    query = norm_text(query)
-    if not query:
-        query = "Python разработчик"
-
-    return {
-        "query": query,
-        "want_n": want_n,
-        "area": area,
-        "experience": experience,
-        "remote": remote,
-        "salary": salary,
-        "only_with_salary": only_with_salary,
-    }
-
-
-def print_ai_examples() -> None:
-    print(
-        "\nПримеры обращения к AI:\n"
-        "- Открой hh.ru и найди 5 вакансий Python backend в Москве, удалёнка, middle\n"
-        "- Открой hh.ru и найди 3 вакансии Django в СПб, junior, зарплата от 150к\n"
-        "- Открой hh.ru и найди 10 вакансий FastAPI по РФ, удалёнка, between 3-6\n"
-    )
-
-
-# -------------------------
-# Интерактивный UI
-# -------------------------
-
-HELP = """
-Команды:
-  help                  справка
-  list                  показать вакансии на текущей странице
-  open N                открыть вакансию N
-  apply N               подготовить/отправить отклик на вакансию N
-  next                  следующая страница поиска
-  prev                  предыдущая страница поиска
-  refresh               обновить страницу и пересобрать список
-
-  submit on|off          авто-отправка (по умолчанию off)
-
-  ai                    повторное обращение к "AI" (перестроить поиск и фильтры)
-  ai top                показать топ N (N из последней AI-фразы, иначе 5)
-  ai help               примеры AI-запросов
-
-  exit                  выйти
-""".strip()
-
-
-def print_list(vacancies: List[Vacancy], page_num: int) -> None:
-    print(f"\nСтраница: {page_num} | Вакансий: {len(vacancies)}\n")
-    for i, v in enumerate(vacancies, 1):
-        print(f"{i:>2}. {v.title}")
-    print("")
-
-
-def parse_int(s: str) -> Optional[int]:
-    try:
-        return int(s)
-    except Exception:
-        return None
-
-
-def run_search(
-    page: Page,
-    query: str,
-    page_num: int,
-    area: Optional[int],
-    experience: Optional[str],
-    remote: Optional[bool],
-    salary: Optional[int],
-    only_with_salary: Optional[bool],
-) -> List[Vacancy]:
-    url = build_search_url(
-        query=query,
-        page=page_num,
-        area=area,
-        experience=experience,
-        remote=remote,
-        salary=salary,
-        only_with_salary=only_with_salary,
-    )
-    page.goto(url, wait_until="domcontentloaded", timeout=60000)
-    wait_settle(page)
-    ensure_logged_in_hint(page)
-    return collect_vacancies_from_search(page)
-
-
-def print_active_filters(
-    query: str,
-    area: Optional[int],
-    experience: Optional[str],
-    remote: Optional[bool],
-    salary: Optional[int],
-    only_with_salary: Optional[bool],
-) -> None:
-    area_name = {1: "Москва", 2: "СПб", 113: "РФ"}.get(area, str(area) if area else "не задано")
-    print("\nАктивный поиск:")
-    print(f"- text: {query}")
-    print(f"- area: {area_name}")
-    print(f"- experience: {experience or 'не задано'}")
-    print(f"- remote: {'да' if remote else 'нет'}")
-    if salary is None:
-        print("- salary: не задано")
-    else:
-        print(f"- salary: от {salary}")
-    print(f"- only_with_salary: {'да' if only_with_salary else 'нет'}\n")
-
-
-def main() -> None:
-    print("Агент HH (интерактивный режим).")
-
-    # --- Первый ввод: обращение к AI (задача), а не поисковая строка
-    user_goal = input(
-        "AI> Опишите задачу (пример: 'Открой hh.ru и найди 5 вакансий Python в Москве, удалёнка, middle'): "
-    ).strip()
-    if not user_goal:
-        user_goal = "Открой hh.ru и найди 5 вакансий Python разработчик в Москве, удалёнка, middle"
-
-    parsed = ai_interpret_user_goal(user_goal)
-
-    query = parsed.get("query") or "Python разработчик"
-    last_ai_want_n: Optional[int] = parsed.get("want_n")
-
-    area = parsed.get("area")
-    experience = parsed.get("experience")
-    remote = parsed.get("remote")
-    salary = parsed.get("salary")
-    only_with_salary = parsed.get("only_with_salary")
-
-    submit = False
-    letter = cover_letter_6_8_lines()
-    page_num = 0
-
-    with sync_playwright() as pw:
-        context = launch_context_robust(pw)
-        page = context.new_page()
-
-        # Открываем hh.ru
-        page.goto("https://hh.ru", wait_until="domcontentloaded", timeout=60000)
-        wait_settle(page)
-        ensure_logged_in_hint(page)
-
-        # Переходим на поиск с фильтрами
-        vacancies = run_search(
-            page=page,
-            query=query,
-            page_num=page_num,
-            area=area,
-            experience=experience,
-            remote=remote,
-            salary=salary,
-            only_with_salary=only_with_salary,
-        )
-
-        print_active_filters(query, area, experience, remote, salary, only_with_salary)
-
-        if vacancies:
-            print_list(vacancies, page_num)
-        else:
-            print("[warn] Не удалось собрать вакансии (возможна капча/изменение верстки). Попробуйте refresh или ai.")
-
-        print("\nСопроводительное (6–8 строк):\n")
-        print(letter)
-        print("\n" + HELP + "\n")
-
-        while True:
-            cmd = input(f"[submit={'on' if submit else 'off'}] hh> ").strip()
-            if not cmd:
-                continue
-
-            parts = cmd.split()
-            c = parts[0].lower()
-
-            try:
-                if c == "help":
-                    print("\n" + HELP + "\n")
-
-                elif c == "exit":
-                    break
-
-                elif c == "list":
-                    vacancies = collect_vacancies_from_search(page)
-                    print_list(vacancies, page_num)
-
-                elif c == "refresh":
-                    page.reload(wait_until="domcontentloaded", timeout=60000)
-                    wait_settle(page)
-                    ensure_logged_in_hint(page)
-                    vacancies = collect_vacancies_from_search(page)
-                    if not vacancies:
-                        print("[warn] Пусто/не распарсилось. Возможно, капча.")
-                    else:
-                        print_list(vacancies, page_num)
-
-                elif c == "next":
-                    page_num += 1
-                    vacancies = run_search(page, query, page_num, area, experience, remote, salary, only_with_salary)
-                    print_list(vacancies, page_num)
-
-                elif c == "prev":
-                    page_num = max(0, page_num - 1)
-                    vacancies = run_search(page, query, page_num, area, experience, remote, salary, only_with_salary)
-                    print_list(vacancies, page_num)
-
-                elif c == "submit":
-                    if len(parts) < 2 or parts[1].lower() not in ("on", "off"):
-                        print("Использование: submit on|off")
-                        continue
-                    submit = (parts[1].lower() == "on")
-                    print(f"[ok] submit={'on' if submit else 'off'}")
-
-                elif c == "open":
-                    if len(parts) < 2:
-                        print("Использование: open N")
-                        continue
-                    n = parse_int(parts[1])
-                    if not n or n < 1 or n > len(vacancies):
-                        print("[err] Неверный номер вакансии.")
-                        continue
-                    v = vacancies[n - 1]
-                    open_vacancy(page, v)
-                    print(f"[ok] Открыто: {v.title}\n{v.url}\n")
-
-                elif c == "apply":
-                    if len(parts) < 2:
-                        print("Использование: apply N")
-                        continue
-                    n = parse_int(parts[1])
-                    if not n or n < 1 or n > len(vacancies):
-                        print("[err] Неверный номер вакансии.")
-                        continue
-                    v = vacancies[n - 1]
-                    respond_to_vacancy(page, v, letter=letter, submit=submit)
-                    page.wait_for_timeout(900)
-
-                elif c == "ai":
-                    sub = parts[1].lower() if len(parts) > 1 else ""
-
-                    if sub == "help":
-                        print_ai_examples()
-                        continue
-
-                    if sub == "top":
-                        current = collect_vacancies_from_search(page)
-                        if not current:
-                            print("[warn] Нет вакансий для top. Сделайте refresh или ai (новый поиск).")
-                            continue
-
-                        top_n = last_ai_want_n if last_ai_want_n else 5
-                        top_n = max(1, min(top_n, len(current)))
-
-                        print(f"\nТоп {top_n} вакансий (как на странице):\n")
-                        for i, v in enumerate(current[:top_n], 1):
-                            print(f"{i:>2}. {v.title}\n    {v.url}")
-                        print("")
-                        continue
-
-                    user_text = input(
-                        "AI> Сформулируйте заново (пример: 'Найди 3 вакансии Django в СПб, junior, удалёнка'): "
-                    ).strip()
-                    if not user_text:
-                        print("[info] Пусто — команда ai отменена.")
-                        continue
-
-                    parsed = ai_interpret_user_goal(user_text)
-
-                    query = parsed.get("query") or query
-                    last_ai_want_n = parsed.get("want_n") or last_ai_want_n
-
-                    area = parsed.get("area")
-                    experience = parsed.get("experience")
-                    remote = parsed.get("remote")
-                    salary = parsed.get("salary")
-                    only_with_salary = parsed.get("only_with_salary")
-
-                    page_num = 0
-                    vacancies = run_search(page, query, page_num, area, experience, remote, salary, only_with_salary)
-
-                    print_active_filters(query, area, experience, remote, salary, only_with_salary)
-
-                    if vacancies:
-                        print_list(vacancies, page_num)
-                    else:
-                        print("[warn] По этому запросу не удалось собрать вакансии (возможно капча/верстка).")
-
-                else:
-                    print("[err] Неизвестная команда. Введите help.")
-
-            except PWTimeoutError:
-                print("[warn] Таймаут. Попробуйте refresh или повторите команду.")
-            except Exception as e:
-                print(f"[warn] Ошибка: {type(e).__name__}: {e}")
-
-        context.close()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import asyncio
+import functools
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Set
+from urllib.parse import urlencode, urlsplit
+
+from playwright.async_api import (
+    async_playwright,
+    BrowserContext,
+    Locator,
+    Page,
+    TimeoutError as PWTimeoutError,
+)
+
+try:
+    import httpx
+    from selectolax.parser import HTMLParser
+except ImportError:  # без них выдача собирается через браузер
+    httpx = None
+    HTMLParser = None
+
+# -------------------------
+# Настройки
+# -------------------------
+
+YANDEX_PATH = os.path.expandvars(r"%LOCALAPPDATA%\Yandex\YandexBrowser\Application\browser.exe")
+
+PROFILE_DIR = os.path.abspath("./browser_profile_pw")  # persistent-профиль (логин, куки)
+FALLBACK_PROFILE_DIR = os.path.abspath("./browser_profile_pw_fallback")
+LAUNCH_CACHE_PATH = os.path.abspath("./.launch_cache.json")  # какой способ запуска сработал в прошлый раз
+APPLIED_PATH = os.path.expanduser("~/.hh_agent_seen.json")  # вакансии, на которые отклик уже отправлен
+
+LAUNCH_TIMEOUT_MS = 25_000
+
+HEADLESS = False
+ITEMS_ON_PAGE = 20
+MAX_LINKS_SCAN = 260
+APPLY_CONCURRENCY = 4  # сколько откликов apply_many готовит одновременно (по вкладке на каждый)
+
+# Что не нужно для парсинга выдачи — не грузим (шаблоны CDP Network.setBlockedURLs).
+# CSS оставляем: без него ломаются innerText и видимость элементов.
+BLOCKED_TRACKER_PATTERNS = ["*mc.yandex*", "*google-analytics*", "*doubleclick*", "*adfox*"]
+BLOCKED_ASSET_PATTERNS = [
+    f"*.{ext}*" for ext in ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "woff", "ttf", "otf", "mp4", "webm")
+]
+# На этих страницах картинки нужны пользователю (капча, форма входа)
+ASSETS_ALLOWED_URL_PARTS = ("captcha", "/account/")
+
+
+# -------------------------
+# Модели
+# -------------------------
+
+@dataclass
+class Vacancy:
+    title: str
+    url: str
+    snippet: str
+
+
+class Goal(NamedTuple):
+    # неизменяемый результат ai_interpret_user_goal (кэшируется)
+    query: str
+    want_n: Optional[int]
+    area: Optional[int]
+    experience: Optional[str]
+    remote: bool
+    salary: Optional[int]
+    only_with_salary: bool
+
+
+# -------------------------
+# Текст/URL утилиты
+# -------------------------
+
+def norm_text(s: str) -> str:
+    # split()/join() схлопывают пробелы на C-уровне, быстрее регулярки
+    return " ".join((s or "").split())
+
+
+@functools.lru_cache(maxsize=64)
+def build_search_url(
+    query: str,
+    page: int = 0,
+    area: Optional[int] = None,
+    experience: Optional[str] = None,
+    remote: Optional[bool] = None,
+    salary: Optional[int] = None,
+    only_with_salary: Optional[bool] = None,
+) -> str:
+    params = {"text": query, "items_on_page": str(ITEMS_ON_PAGE), "no_magic": "true"}
+
+    if area is not None:
+        params["area"] = str(area)
+
+    if experience:
+        params["experience"] = experience
+
+    if remote:
+        params["schedule"] = "remote"
+
+    if salary is not None:
+        params["salary"] = str(salary)
+
+    if only_with_salary:
+        params["only_with_salary"] = "true"
+
+    params["page"] = str(page)
+    return f"https://hh.ru/search/vacancy?{urlencode(params)}"
+
+
+async def wait_settle(page: Page, timeout_ms: int = 20000) -> None:
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+    except Exception:
+        pass
+    # Вместо фиксированной паузы ждём тишины в сети (не дольше 3 с)
+    try:
+        await page.wait_for_load_state("networkidle", timeout=3000)
+    except Exception:
+        pass
+
+
+async def first_visible(
+    page: Page, selectors: List[str], timeout: int = 9000, grace: int = 1500
+) -> Optional[Locator]:
+    # Опрашиваем селекторы разом, а не ждём полный таймаут на каждый по очереди.
+    # Селектор i участвует только спустя i*grace мс: более точные (ранние в списке)
+    # успевают появиться раньше, чем выиграет общий fallback вроде "textarea".
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + timeout / 1000
+    while True:
+        elapsed_ms = (loop.time() - start) * 1000
+        eligible = selectors[: 1 + int(elapsed_ms // grace)]
+        locs = [page.locator(sel).first for sel in eligible]
+        visible = await asyncio.gather(*(loc.is_visible() for loc in locs), return_exceptions=True)
+        for loc, ok in zip(locs, visible):
+            if ok is True:
+                return loc
+        if loop.time() >= deadline:
+            return None
+        await asyncio.sleep(0.25)
+
+
+async def safe_click(page: Page, selectors: List[str], timeout: int = 9000) -> bool:
+    loc = await first_visible(page, selectors, timeout=timeout)
+    if loc is None:
+        return False
+    try:
+        await loc.click(timeout=2000)
+        return True
+    except Exception:
+        return False
+
+
+async def safe_fill(page: Page, selectors: List[str], value: str, timeout: int = 9000) -> bool:
+    loc = await first_visible(page, selectors, timeout=timeout)
+    if loc is None:
+        return False
+    try:
+        await loc.click(timeout=2000)
+        await loc.fill(value, timeout=2000)
+        return True
+    except Exception:
+        return False
+
+
+async def ensure_logged_in_hint(page: Page) -> None:
+    # Подсказка: если видим "Войти" — вероятно, не авторизованы
+    try:
+        if await page.locator("text=Войти").first.is_visible(timeout=1200):
+            print("\n[info] Похоже, вы не авторизованы на hh.ru.")
+            print("[info] Войдите вручную в открывшемся браузере и продолжайте работу.\n")
+    except Exception:
+        pass
+
+
+def ensure_dir_clean(path: str) -> None:
+    if os.path.exists(path):
+        shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+# -------------------------
+# Playwright запуск
+# -------------------------
+
+async def _launch_once(pw, user_data_dir: str, use_yandex: bool) -> BrowserContext:
+    kwargs = dict(
+        user_data_dir=user_data_dir,
+        headless=HEADLESS,
+        viewport={"width": 1280, "height": 900},
+        timeout=LAUNCH_TIMEOUT_MS,
+        args=[
+            "--disable-blink-features=AutomationControlled",
+            "--disable-gpu",
+            "--disable-software-rasterizer",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--disable-translate",
+            "--metrics-recording-only",
+            "--mute-audio",
+            "--js-flags=--max-old-space-size=256",
+        ],
+        ignore_default_args=["--enable-automation"],
+    )
+
+    if HEADLESS:
+        # Для серверов/контейнеров; в видимом браузере пользователя песочницу не трогаем
+        kwargs["args"] += [
+            "--disable-dev-shm-usage",
+            "--no-sandbox",
+            "--disable-setuid-sandbox",
+        ]
+
+    if use_yandex and os.path.exists(YANDEX_PATH):
+        kwargs["executable_path"] = YANDEX_PATH
+
+    # Страховка на случай, если Playwright завис и сам таймаут не сработал
+    return await asyncio.wait_for(
+        pw.chromium.launch_persistent_context(**kwargs),
+        timeout=LAUNCH_TIMEOUT_MS / 1000 + 5,
+    )
+
+
+def _load_launch_cache() -> Optional[str]:
+    try:
+        with open(LAUNCH_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f).get("attempt")
+    except Exception:
+        return None
+
+
+def _save_launch_cache(name: str) -> None:
+    try:
+        with open(LAUNCH_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"attempt": name}, f)
+    except OSError:
+        pass
+
+
+async def launch_context_robust(pw) -> BrowserContext:
+    """
+    Порядок попыток:
+      1) Chromium (Playwright) с основным профилем
+      2) Chromium (Playwright) с чистым fallback-профилем
+      3) Yandex с чистым fallback-профилем (если установлен)
+
+    Основной профиль (с логином) всегда пробуется первым. Если в прошлый раз
+    сработал один из fallback-вариантов, он идёт сразу за ним — и без очистки профиля.
+    """
+    attempts = [
+        ("Chromium main profile", PROFILE_DIR, False, False),
+        ("Chromium fresh fallback", FALLBACK_PROFILE_DIR, False, True),
+        ("Yandex fresh fallback", FALLBACK_PROFILE_DIR, True, True),
+    ]
+
+    cached = _load_launch_cache()
+    for i, (name, profile_dir, use_yandex, _fresh) in enumerate(attempts[1:], 1):
+        if name == cached:
+            del attempts[i]
+            attempts.insert(1, (name, profile_dir, use_yandex, False))
+            break
+
+    last_exc: Optional[Exception] = None
+
+    for name, profile_dir, use_yandex, fresh in attempts:
+        try:
+            if fresh:
+                ensure_dir_clean(profile_dir)
+            else:
+                os.makedirs(profile_dir, exist_ok=True)
+
+            print(f"[info] Launch attempt: {name} | profile={profile_dir}")
+            ctx = await _launch_once(pw, user_data_dir=profile_dir, use_yandex=use_yandex)
+            print("[ok] Browser context launched.")
+            _save_launch_cache(name)
+            return ctx
+        except Exception as e:
+            last_exc = e
+            print(f"[warn] Launch failed: {name}\n       {type(e).__name__}: {e}\n")
+            await asyncio.sleep(1.0)
+
+    raise RuntimeError(f"Не удалось запустить браузер ни одним способом. Последняя ошибка: {last_exc}")
+
+
+async def _set_blocked_urls(session, url: str) -> None:
+    patterns = list(BLOCKED_TRACKER_PATTERNS)
+    if not any(part in url for part in ASSETS_ALLOWED_URL_PARTS):
+        patterns += BLOCKED_ASSET_PATTERNS
+    try:
+        await session.send("Network.setBlockedURLs", {"urls": patterns})
+    except Exception:  # вкладка уже закрыта
+        pass
+
+
+async def block_heavy_resources(page: Page) -> None:
+    # Блокируем через CDP, а не page.route: роутинг отключает HTTP-кэш браузера
+    # и гоняет каждый запрос через Python
+    try:
+        session = await page.context.new_cdp_session(page)
+        await session.send("Network.enable")
+    except Exception:  # браузер без CDP — просто грузим всё
+        return
+    await _set_blocked_urls(session, page.url)
+
+    async def on_navigated(frame) -> None:
+        if frame == page.main_frame:
+            await _set_blocked_urls(session, frame.url)
+
+    page.on("framenavigated", on_navigated)
+
+
+async def new_tab(context: BrowserContext) -> Page:
+    page = await context.new_page()
+    await block_heavy_resources(page)
+    return page
+
+
+@dataclass
+class BrowserInstance:
+    context: BrowserContext
+    page: Page  # единственная рабочая вкладка, переиспользуется всеми командами
+
+
+@asynccontextmanager
+async def get_context() -> AsyncIterator[BrowserInstance]:
+    async with async_playwright() as pw:
+        context = await launch_context_robust(pw)
+        # persistent-контекст стартует с пустой вкладкой — берём её, а не открываем ещё одну
+        if context.pages:
+            page = context.pages[0]
+            await block_heavy_resources(page)
+        else:
+            page = await new_tab(context)
+        try:
+            yield BrowserInstance(context=context, page=page)
+        finally:
+            await context.close()
+
+
+# -------------------------
+# HH логика
+# -------------------------
+
+VACANCY_LINK_SELECTOR = "a[href*='/vacancy/']"
+
+# Один проход по DOM внутри страницы вместо N CDP-запросов на каждую ссылку
+_COLLECT_JS = """
+([selector, maxScan, maxItems]) => {
+    const out = [];
+    const seen = new Set();
+    const anchors = document.querySelectorAll(selector);
+    for (let i = 0; i < anchors.length && i < maxScan; i++) {
+        const a = anchors[i];
+        const href = a.href.split("?")[0];
+        if (!href.includes("/vacancy/") || seen.has(href)) continue;
+        seen.add(href);
+
+        const title = (a.innerText || "").trim();
+        if (!title) continue;
+
+        const card = a.closest("div, article");
+        const snippet = card ? card.innerText || "" : "";
+        out.push({href, title, snippet});
+        if (out.length >= maxItems) break;
+    }
+    return out;
+}
+"""
+
+
+async def collect_vacancies_from_search(page: Page) -> List[Vacancy]:
+    vacancies: List[Vacancy] = []
+
+    try:
+        await page.wait_for_selector(VACANCY_LINK_SELECTOR, timeout=20000)
+        data = await page.evaluate(_COLLECT_JS, [VACANCY_LINK_SELECTOR, MAX_LINKS_SCAN, ITEMS_ON_PAGE])
+    except Exception:
+        return vacancies
+
+    for item in data:
+        title = norm_text(item.get("title"))
+        if not title:
+            continue
+        snippet = norm_text(item.get("snippet"))[:450]
+        vacancies.append(Vacancy(title=title, url=item["href"], snippet=snippet))
+
+    return vacancies
+
+
+# -------------------------
+# Выдача напрямую по HTTP (без браузера)
+# -------------------------
+
+async def make_http_client(page: Page) -> Optional["httpx.AsyncClient"]:
+    if httpx is None or HTMLParser is None:
+        return None
+
+    headers = {
+        "User-Agent": await page.evaluate("navigator.userAgent"),
+        "Accept-Language": "ru-RU,ru;q=0.9",
+    }
+    try:
+        client = httpx.AsyncClient(http2=True, headers=headers, follow_redirects=True, timeout=20.0)
+    except ImportError:  # http2 требует пакет h2
+        client = httpx.AsyncClient(headers=headers, follow_redirects=True, timeout=20.0)
+
+    return client
+
+
+async def sync_http_cookies(client: "httpx.AsyncClient", context: BrowserContext) -> None:
+    # Сессия (логин) живёт в браузере — переносим её куки в HTTP-клиент
+    for c in await context.cookies("https://hh.ru"):
+        client.cookies.set(c["name"], c["value"], domain=c["domain"], path=c["path"])
+
+
+def _card_node(a):
+    node = a.parent
+    fallback = None
+    while node is not None:
+        if "vacancy-serp__vacancy" in (node.attributes.get("data-qa") or ""):
+            return node
+        if fallback is None and node.tag in ("div", "article"):
+            fallback = node
+        node = node.parent
+    return fallback
+
+
+async def collect_vacancies_http(client: "httpx.AsyncClient", url: str) -> Optional[List[Vacancy]]:
+    """
+    None — если hh не отдал выдачу (капча/антибот/другая вёрстка);
+    тогда вызывающий код идёт через браузер.
+    """
+    try:
+        r = await client.get(url)
+    except Exception:
+        return None
+    if r.status_code != 200:
+        return None
+
+    tree = HTMLParser(r.text)
+    vacancies: List[Vacancy] = []
+    seen = set()
+    for a in tree.css("a[data-qa='serp-item__title']")[:MAX_LINKS_SCAN]:
+        href = a.attributes.get("href") or ""
+        if "/vacancy/" not in href:
+            continue
+
+        if href.startswith("/"):
+            href = "https://hh.ru" + href
+
+        href = href.split("?")[0]
+        if href in seen:
+            continue
+        seen.add(href)
+
+        title = norm_text(a.text())
+        if not title:
+            continue
+
+        card = _card_node(a)
+        snippet = norm_text(card.text(separator=" ")) if card is not None else ""
+        vacancies.append(Vacancy(title=title, url=href, snippet=snippet[:450]))
+
+        if len(vacancies) >= ITEMS_ON_PAGE:
+            break
+
+    return vacancies or None
+
+
+async def open_vacancy(page: Page, v: Vacancy) -> None:
+    await page.goto(v.url, wait_until="domcontentloaded", timeout=60000)
+    await wait_settle(page)
+    await ensure_logged_in_hint(page)
+
+
+def cover_letter_6_8_lines() -> str:
+    lines = [
+        "Здравствуйте!",
+        "Интересна позиция Python-разработчика: пишу production-код и довожу задачи до результата.",
+        "Опыт: backend/API, интеграции, фоновые задачи, БД, оптимизация и отладка.",
+        "Работаю с Django/FastAPI, уделяю внимание качеству, тестированию и логированию.",
+        "При необходимости подключаю LLM-интеграции (RAG, инструменты, оценка качества).",
+        "Готов быстро пройти интервью и выполнить тестовое задание.",
+        "Спасибо! Буду рад обсудить детали.",
+    ]
+    return "\n".join(lines)
+
+
+async def respond_to_vacancy(page: Page, v: Vacancy, letter: str, submit: bool) -> bool:
+    await open_vacancy(page, v)
+
+    clicked = await safe_click(
+        page,
+        selectors=[
+            "text=Откликнуться",
+            "button:has-text('Откликнуться')",
+            "[data-qa*='vacancy-response']",
+        ],
+        timeout=12000,
+    )
+
+    if not clicked:
+        print(f"[warn] Не нашёл кнопку «Откликнуться»: {v.url}")
+        return False
+
+    await wait_settle(page)
+
+    filled = await safe_fill(
+        page,
+        selectors=[
+            "[data-qa*='vacancy-response-letter'] textarea",
+            "[data-qa*='cover-letter'] textarea",
+            "textarea",
+        ],
+        value=letter,
+        timeout=12000,
+    )
+
+    if not filled:
+        filled = await safe_fill(page, ["[contenteditable='true']"], value=letter, timeout=2000)
+
+    if not filled:
+        print(f"[warn] Не удалось вставить письмо. Оставил страницу открытой: {v.url}")
+        return False
+
+    if not submit:
+        print(f"[ok] Письмо вставлено (НЕ отправлено). Проверьте и отправьте вручную: {v.url}")
+        return True
+
+    # Ждём ответа hh на отправку отклика вместо фиксированной паузы.
+    # Ожидание ставим до клика, чтобы не пропустить быстрый ответ; 9 с на поиск кнопки + 5 с на ответ
+    response = asyncio.create_task(
+        page.wait_for_response(lambda r: "/applicant/vacancy_response" in r.url, timeout=14000)
+    )
+    clicked = await safe_click(
+        page,
+        selectors=[
+            "button:has-text('Отправить')",
+            "text=Отправить",
+        ],
+        timeout=9000,
+    )
+
+    if not clicked:
+        response.cancel()
+    (resp,) = await asyncio.gather(response, return_exceptions=True)
+
+    if not clicked:
+        print(f"[warn] Не нашёл финальную кнопку отправки. Проверьте вручную: {v.url}")
+        return False
+
+    if isinstance(resp, BaseException) or not resp.ok:
+        print(f"[warn] Нажал «Отправить», но hh не подтвердил отклик. Проверьте вручную: {v.url}")
+        return False
+
+    print(f"[ok] Отклик отправлен: {v.url}")
+    return True
+
+
+def load_applied() -> Set[str]:
+    try:
+        with open(APPLIED_PATH, encoding="utf-8") as f:
+            return set(json.load(f))
+    except Exception:
+        return set()
+
+
+def save_applied(applied: Set[str]) -> None:
+    try:
+        with open(APPLIED_PATH, "w", encoding="utf-8") as f:
+            json.dump(sorted(applied), f, ensure_ascii=False)
+    except OSError:
+        pass
+
+
+def drop_seen_elsewhere(vacancies: List[Vacancy], seen: Dict[str, int], page_num: int) -> List[Vacancy]:
+    # hh повторяет вакансии на соседних страницах (репосты, продвижение) —
+    # показываем каждую только на той странице, где она встретилась впервые
+    out: List[Vacancy] = []
+    for v in vacancies:
+        if seen.setdefault(v.url, page_num) == page_num:
+            out.append(v)
+    return out
+
+
+async def apply_many(
+    context: BrowserContext, vacancies: List[Vacancy], letter: str, submit: bool
+) -> List[Vacancy]:
+    sem = asyncio.Semaphore(APPLY_CONCURRENCY)
+
+    async def apply_one(v: Vacancy) -> bool:
+        async with sem:
+            page = await new_tab(context)
+            ok = False
+            try:
+                ok = await respond_to_vacancy(page, v, letter=letter, submit=submit)
+                return ok
+            finally:
+                # Вкладку оставляем, если пользователю нужно проверить/отправить отклик вручную
+                if submit and ok:
+                    await page.close()
+
+    results = await asyncio.gather(*(apply_one(v) for v in vacancies), return_exceptions=True)
+    for v, r in zip(vacancies, results):
+        if isinstance(r, BaseException):
+            print(f"[warn] Ошибка при отклике: {type(r).__name__}: {r}\n       {v.url}")
+    return [v for v, r in zip(vacancies, results) if r is True]
+
+
+# -------------------------
+# "AI" парсер задачи -> query и фильтры
+# -------------------------
+
+_INT_RE = re.compile(r"\b(\d{1,2})\b")
+_EXP_1_3 = re.compile(r"\b1\s*[-–]\s*3\b")
+_EXP_3_6 = re.compile(r"\b3\s*[-–]\s*6\b")
+_EXP_6P = re.compile(r"\b6\+\b|\bболее\s*6\b")
+_SAL_K = re.compile(r"(?:от\s*)?(\d{2,3})\s*(?:к|k)\b")  # "200к"
+_SAL_N = re.compile(r"(?:от\s*)?(\d{5,6})\b")  # "150000"
+_CLEAN_QUERY = re.compile(
+    r"\b(открой|открыть|hh|hh\.ru|хх|хх\.ру|найди|найти|покажи|ваканси[яи]|с фильтрами|по фильтрам)\b",
+    re.I,
+)
+
+_TOKEN_EFFECTS = {
+    # area: Москва=1, СПб=2, РФ=113
+    "моск": ("area", 1),
+    "питер": ("area", 2),
+    "спб": ("area", 2),
+    "санкт-петер": ("area", 2),
+    "росси": ("area", 113),
+    "рф": ("area", 113),
+    # опыт
+    "без опыта": ("experience", "noExperience"),
+    "стажер": ("experience", "noExperience"),
+    "стажёр": ("experience", "noExperience"),
+    "intern": ("experience", "noExperience"),
+    "junior": ("experience", "noExperience"),
+    "джун": ("experience", "noExperience"),
+    "middle": ("experience", "between1And3"),
+    "мидл": ("experience", "between1And3"),
+    "мид": ("experience", "between1And3"),
+    "senior": ("experience", "between3And6"),
+    "сеньор": ("experience", "between3And6"),
+    "синьор": ("experience", "between3And6"),
+    "lead": ("experience", "between3And6"),
+    "лид": ("experience", "between3And6"),
+    # удалёнка
+    "удален": ("remote", True),
+    "удалён": ("remote", True),
+    "remote": ("remote", True),
+    "из дома": ("remote", True),
+    # роль: битовая маска, i-й бит — _ROLE_LABEL[i]
+    "python": ("role", 1),
+    "питон": ("role", 1),
+    "backend": ("role", 2),
+    "бэкенд": ("role", 2),
+    "бекенд": ("role", 2),
+    "django": ("role", 4),
+    "fastapi": ("role", 8),
+    "asyncio": ("role", 16),
+}
+
+# Автомат для всех ключевых слов строится из словаря один раз при импорте;
+# длинные слова раньше коротких, чтобы "мидл" не распознавался как "мид"
+_GOAL_ALTERNATION = re.compile(
+    "|".join(re.escape(kw) for kw in sorted(_TOKEN_EFFECTS, key=len, reverse=True))
+)
+
+# Если совпало несколько значений одного поля — побеждает более раннее
+_AREA_ORDER = (1, 2, 113)
+_EXPERIENCE_ORDER = ("noExperience", "between1And3", "between3And6")
+_ROLE_LABEL = ("Python", "backend", "Django", "FastAPI", "asyncio")
+
+
+def _extract_int(text: str) -> Optional[int]:
+    m = _INT_RE.search(text)
+    if not m:
+        return None
+    try:
+        return int(m.group(1))
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=128)
+def ai_interpret_user_goal(user_text: str) -> Goal:
+    t = norm_text(user_text or "")
+    tl = t.lower()
+
+    want_n = _extract_int(tl)
+
+    found = {"area": set(), "experience": set(), "remote": set()}
+    role_mask = 0
+    for m in _GOAL_ALTERNATION.finditer(tl):
+        field, value = _TOKEN_EFFECTS[m.group(0)]
+        if field == "role":
+            role_mask |= value
+        else:
+            found[field].add(value)
+
+    area = next((a for a in _AREA_ORDER if a in found["area"]), None)
+
+    # опыт
+    experience = next((e for e in _EXPERIENCE_ORDER if e in found["experience"]), None)
+
+    if _EXP_1_3.search(tl):
+        experience = "between1And3"
+    if _EXP_3_6.search(tl):
+        experience = "between3And6"
+    if _EXP_6P.search(tl):
+        experience = "moreThan6"
+
+    # удалёнка
+    remote = bool(found["remote"])
+
+    # зарплата
+    salary = None
+    only_with_salary = False
+    m_sal = _SAL_K.search(tl)
+    if m_sal:
+        salary = int(m_sal.group(1)) * 1000
+    else:
+        m_sal2 = _SAL_N.search(tl)
+        if m_sal2:
+            salary = int(m_sal2.group(1))
+
+    if salary is not None and any(x in tl for x in ["только с зп", "только с зарплат", "с зарплатой", "only_with_salary"]):
+        only_with_salary = True
+
+    # запрос (text)
+    role_bits = [label for i, label in enumerate(_ROLE_LABEL) if role_mask >> i & 1]
+
+    if role_bits:
+        query = " ".join(role_bits) + " разработчик"
+    else:
+        query = t
+
+    query = _CLEAN_QUERY.sub(" ", query)
+    query = norm_text(query)
+    if not query:
+        query = "Python разработчик"
+
+    return Goal(
+        query=query,
+        want_n=want_n,
+        area=area,
+        experience=experience,
+        remote=remote,
+        salary=salary,
+        only_with_salary=only_with_salary,
+    )
+
+
+def print_ai_examples() -> None:
+    print(
+        "\nПримеры обращения к AI:\n"
+        "- Открой hh.ru и найди 5 вакансий Python backend в Москве, удалёнка, middle\n"
+        "- Открой hh.ru и найди 3 вакансии Django в СПб, junior, зарплата от 150к\n"
+        "- Открой hh.ru и найди 10 вакансий FastAPI по РФ, удалёнка, between 3-6\n"
+    )
+
+
+# -------------------------
+# Интерактивный UI
+# -------------------------
+
+HELP = """
+Команды:
+  help                  справка
+  list                  показать вакансии на текущей странице
+  open N                открыть вакансию N
+  apply N [force]       подготовить/отправить отклик на вакансию N
+                        (force — даже если отклик уже отправлялся)
+  apply_many N1,N2,... [force]
+                        то же для нескольких вакансий параллельно (в отдельных вкладках)
+  applied clear         забыть, на какие вакансии отклик уже отправлялся
+  next                  следующая страница поиска
+  prev                  предыдущая страница поиска
+  refresh               обновить страницу и пересобрать список
+
+  submit on|off          авто-отправка (по умолчанию off)
+
+  ai                    повторное обращение к "AI" (перестроить поиск и фильтры)
+  ai top                показать топ N (N из последней AI-фразы, иначе 5)
+  ai help               примеры AI-запросов
+
+  exit                  выйти
+""".strip()
+
+
+def print_list(vacancies: List[Vacancy], page_num: int) -> None:
+    print(f"\nСтраница: {page_num} | Вакансий: {len(vacancies)}\n")
+    for i, v in enumerate(vacancies, 1):
+        print(f"{i:>2}. {v.title}")
+    print("")
+
+
+def parse_int(s: str) -> Optional[int]:
+    try:
+        return int(s)
+    except Exception:
+        return None
+
+
+class SearchResult(NamedTuple):
+    vacancies: List[Vacancy]
+    in_tab: bool  # выдача открыта во вкладке (путь через браузер), а не получена по HTTP
+
+
+async def run_search(
+    page: Page,
+    query: str,
+    page_num: int,
+    area: Optional[int],
+    experience: Optional[str],
+    remote: Optional[bool],
+    salary: Optional[int],
+    only_with_salary: Optional[bool],
+    http: Optional["httpx.AsyncClient"] = None,
+) -> SearchResult:
+    # Позиционно, как и в остальных вызовах: lru_cache различает позиционные и именованные аргументы
+    url = build_search_url(query, page_num, area, experience, remote, salary, only_with_salary)
+
+    if http is not None:
+        # Пользователь мог войти в браузере в любой момент — берём актуальные куки
+        await sync_http_cookies(http, page.context)
+        vacancies = await collect_vacancies_http(http, url)
+        if vacancies:
+            return SearchResult(vacancies, in_tab=False)
+
+    cur, target = urlsplit(page.url), urlsplit(url)
+    already_on_search = (cur.scheme, cur.netloc, cur.path) == (target.scheme, target.netloc, target.path)
+
+    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    if not already_on_search:
+        # Уже на выдаче (next/prev/ai) дополнительное ожидание сети не нужно
+        await wait_settle(page)
+    await ensure_logged_in_hint(page)
+    return SearchResult(await collect_vacancies_from_search(page), in_tab=True)
+
+
+@dataclass
+class Prefetcher:
+    page: Page  # фоновая вкладка, в которой заранее грузится следующая страница выдачи
+    http: Optional["httpx.AsyncClient"] = None
+    url: str = ""
+    task: Optional["asyncio.Task[Optional[SearchResult]]"] = None
+
+
+async def _prefetch_run(page: Page, *search_args, http: Optional["httpx.AsyncClient"]) -> Optional[SearchResult]:
+    try:
+        return await run_search(page, *search_args, http=http)
+    except Exception:
+        return None
+
+
+async def cancel_prefetch(pf: Prefetcher) -> None:
+    if pf.task is not None:
+        pf.task.cancel()
+        await asyncio.gather(pf.task, return_exceptions=True)
+        pf.task = None
+
+
+async def prefetch_search(
+    pf: Prefetcher,
+    query: str,
+    page_num: int,
+    area: Optional[int],
+    experience: Optional[str],
+    remote: Optional[bool],
+    salary: Optional[int],
+    only_with_salary: Optional[bool],
+) -> None:
+    await cancel_prefetch(pf)
+    pf.url = build_search_url(query, page_num, area, experience, remote, salary, only_with_salary)
+    pf.task = asyncio.create_task(
+        _prefetch_run(pf.page, query, page_num, area, experience, remote, salary, only_with_salary, http=pf.http)
+    )
+
+
+async def take_prefetched(pf: Prefetcher, url: str) -> Optional[SearchResult]:
+    # None — если в фоне грузилась не эта страница или загрузка упала;
+    # пустой список вызывающий код тоже считает промахом
+    if pf.task is None or pf.url != url:
+        return None
+    result = await pf.task
+    pf.task = None
+    return result
+
+
+def print_active_filters(
+    query: str,
+    area: Optional[int],
+    experience: Optional[str],
+    remote: Optional[bool],
+    salary: Optional[int],
+    only_with_salary: Optional[bool],
+) -> None:
+    area_name = {1: "Москва", 2: "СПб", 113: "РФ"}.get(area, str(area) if area else "не задано")
+    print("\nАктивный поиск:")
+    print(f"- text: {query}")
+    print(f"- area: {area_name}")
+    print(f"- experience: {experience or 'не задано'}")
+    print(f"- remote: {'да' if remote else 'нет'}")
+    if salary is None:
+        print("- salary: не задано")
+    else:
+        print(f"- salary: от {salary}")
+    print(f"- only_with_salary: {'да' if only_with_salary else 'нет'}\n")
+
+
+async def ainput(prompt: str) -> str:
+    # input() блокирует поток — уводим его из event loop.
+    # Поток daemon: при Ctrl+C процесс не ждёт, пока в зависшем input() нажмут Enter
+    # (asyncio.to_thread/ThreadPoolExecutor джойнят свои потоки на выходе).
+    loop = asyncio.get_running_loop()
+    fut: "asyncio.Future[str]" = loop.create_future()
+
+    def resolve(result: Optional[str], exc: Optional[BaseException]) -> None:
+        if fut.done():
+            return
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def read() -> None:
+        try:
+            line, exc = input(prompt), None
+        except BaseException as e:
+            line, exc = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, line, exc)
+        except RuntimeError:  # event loop уже закрыт
+            pass
+
+    threading.Thread(target=read, daemon=True).start()
+    return await fut
+
+
+async def main() -> None:
+    print("Агент HH (интерактивный режим).")
+
+    # --- Первый ввод: обращение к AI (задача), а не поисковая строка
+    user_goal = (await ainput(
+        "AI> Опишите задачу (пример: 'Открой hh.ru и найди 5 вакансий Python в Москве, удалёнка, middle'): "
+    )).strip()
+    if not user_goal:
+        user_goal = "Открой hh.ru и найди 5 вакансий Python разработчик в Москве, удалёнка, middle"
+
+    parsed = ai_interpret_user_goal(user_goal)
+
+    query = parsed.query or "Python разработчик"
+    last_ai_want_n: Optional[int] = parsed.want_n
+
+    area = parsed.area
+    experience = parsed.experience
+    remote = parsed.remote
+    salary = parsed.salary
+    only_with_salary = parsed.only_with_salary
+
+    submit = False
+    letter = cover_letter_6_8_lines()
+    page_num = 0
+
+    session_seen: Dict[str, int] = {}  # url -> страница выдачи, где вакансия встретилась впервые
+    applied = load_applied()
+
+    async with get_context() as browser:
+        page = browser.page
+
+        # Открываем hh.ru
+        await page.goto("https://hh.ru", wait_until="domcontentloaded", timeout=60000)
+        await wait_settle(page)
+        await ensure_logged_in_hint(page)
+
+        # Выдачу по возможности берём HTTP-запросом; браузер — для логина, откликов и как fallback
+        http = await make_http_client(page)
+
+        # Переходим на поиск с фильтрами
+        vacancies, in_tab = await run_search(
+            page=page,
+            query=query,
+            page_num=page_num,
+            area=area,
+            experience=experience,
+            remote=remote,
+            salary=salary,
+            only_with_salary=only_with_salary,
+            http=http,
+        )
+        vacancies = drop_seen_elsewhere(vacancies, session_seen, page_num)
+
+        print_active_filters(query, area, experience, remote, salary, only_with_salary)
+
+        if vacancies:
+            print_list(vacancies, page_num)
+        else:
+            print("[warn] Не удалось собрать вакансии (возможна капча/изменение верстки). Попробуйте refresh или ai.")
+
+        # Вторая вкладка заранее грузит следующую страницу, пока пользователь читает текущую
+        prefetcher = Prefetcher(page=await new_tab(browser.context), http=http)
+        await page.bring_to_front()
+        await prefetch_search(prefetcher, query, page_num + 1, area, experience, remote, salary, only_with_salary)
+
+        print("\nСопроводительное (6–8 строк):\n")
+        print(letter)
+        print("\n" + HELP + "\n")
+
+        while True:
+            cmd = (await ainput(f"[submit={'on' if submit else 'off'}] hh> ")).strip()
+            if not cmd:
+                continue
+
+            parts = cmd.split()
+            c = parts[0].lower()
+
+            try:
+                if c == "help":
+                    print("\n" + HELP + "\n")
+
+                elif c == "exit":
+                    break
+
+                elif c == "list":
+                    # Выдача, полученная по HTTP, во вкладке не открыта — тогда показываем сохранённый список
+                    if in_tab:
+                        vacancies = drop_seen_elsewhere(
+                            await collect_vacancies_from_search(page), session_seen, page_num
+                        )
+                    print_list(vacancies, page_num)
+
+                elif c == "refresh":
+                    if in_tab:
+                        await page.reload(wait_until="domcontentloaded", timeout=60000)
+                        await wait_settle(page)
+                        await ensure_logged_in_hint(page)
+                        vacancies = await collect_vacancies_from_search(page)
+                    else:
+                        vacancies, in_tab = await run_search(
+                            page, query, page_num, area, experience, remote, salary, only_with_salary, http=http
+                        )
+                    vacancies = drop_seen_elsewhere(vacancies, session_seen, page_num)
+                    if not vacancies:
+                        print("[warn] Пусто/не распарсилось. Возможно, капча.")
+                    else:
+                        print_list(vacancies, page_num)
+
+                elif c == "next":
+                    page_num += 1
+                    url = build_search_url(query, page_num, area, experience, remote, salary, only_with_salary)
+                    prefetched = await take_prefetched(prefetcher, url)
+                    # пустой список (таймаут/капча в фоне) — промах, грузим заново
+                    if prefetched and prefetched.vacancies:
+                        vacancies, in_tab = prefetched
+                        if in_tab:
+                            # Вкладка с готовой страницей становится основной, старая — фоновой
+                            page, prefetcher.page = prefetcher.page, page
+                            browser.page = page
+                            await page.bring_to_front()
+                    else:
+                        vacancies, in_tab = await run_search(
+                            page, query, page_num, area, experience, remote, salary, only_with_salary, http=http
+                        )
+                    vacancies = drop_seen_elsewhere(vacancies, session_seen, page_num)
+                    print_list(vacancies, page_num)
+                    await prefetch_search(prefetcher, query, page_num + 1, area, experience, remote, salary, only_with_salary)
+
+                elif c == "prev":
+                    page_num = max(0, page_num - 1)
+                    vacancies, in_tab = await run_search(
+                        page, query, page_num, area, experience, remote, salary, only_with_salary, http=http
+                    )
+                    vacancies = drop_seen_elsewhere(vacancies, session_seen, page_num)
+                    print_list(vacancies, page_num)
+                    await prefetch_search(prefetcher, query, page_num + 1, area, experience, remote, salary, only_with_salary)
+
+                elif c == "submit":
+                    if len(parts) < 2 or parts[1].lower() not in ("on", "off"):
+                        print("Использование: submit on|off")
+                        continue
+                    submit = (parts[1].lower() == "on")
+                    print(f"[ok] submit={'on' if submit else 'off'}")
+
+                elif c == "open":
+                    if len(parts) < 2:
+                        print("Использование: open N")
+                        continue
+                    n = parse_int(parts[1])
+                    if not n or n < 1 or n > len(vacancies):
+                        print("[err] Неверный номер вакансии.")
+                        continue
+                    v = vacancies[n - 1]
+                    await open_vacancy(page, v)
+                    print(f"[ok] Открыто: {v.title}\n{v.url}\n")
+
+                elif c == "apply":
+                    if len(parts) < 2:
+                        print("Использование: apply N [force]")
+                        continue
+                    n = parse_int(parts[1])
+                    if not n or n < 1 or n > len(vacancies):
+                        print("[err] Неверный номер вакансии.")
+                        continue
+                    force = len(parts) > 2 and parts[2].lower() == "force"
+                    v = vacancies[n - 1]
+                    if v.url in applied and not force:
+                        print(f"[info] Отклик уже отправлялся: {v.url} (повторить: apply {n} force)")
+                        continue
+                    if await respond_to_vacancy(page, v, letter=letter, submit=submit) and submit:
+                        applied.add(v.url)
+                        save_applied(applied)
+
+                elif c == "apply_many":
+                    args = " ".join(parts[1:]).replace(",", " ").split()
+                    force = "force" in (a.lower() for a in args)
+                    nums = [parse_int(x) for x in args if x.lower() != "force"]
+                    if not nums:
+                        print("Использование: apply_many N1,N2,N3 [force]")
+                        continue
+                    if any(not n or n < 1 or n > len(vacancies) for n in nums):
+                        print("[err] Неверный номер вакансии.")
+                        continue
+                    chosen = [vacancies[n - 1] for n in dict.fromkeys(nums)]
+                    if not force:
+                        for v in chosen:
+                            if v.url in applied:
+                                print(f"[info] Отклик уже отправлялся: {v.url} (повторить: добавьте force)")
+                        chosen = [v for v in chosen if v.url not in applied]
+                    if not chosen:
+                        continue
+                    done = await apply_many(browser.context, chosen, letter=letter, submit=submit)
+                    print(f"[ok] Успешно обработано: {len(done)} из {len(chosen)}")
+                    if submit and done:
+                        applied.update(v.url for v in done)
+                        save_applied(applied)
+
+                elif c == "applied":
+                    if len(parts) < 2 or parts[1].lower() != "clear":
+                        print(f"Отправленных откликов в списке: {len(applied)}. Очистить: applied clear")
+                        continue
+                    applied.clear()
+                    save_applied(applied)
+                    print("[ok] Список отправленных откликов очищен.")
+
+                elif c == "ai":
+                    sub = parts[1].lower() if len(parts) > 1 else ""
+
+                    if sub == "help":
+                        print_ai_examples()
+                        continue
+
+                    if sub == "top":
+                        current = await collect_vacancies_from_search(page) if in_tab else vacancies
+                        if not current:
+                            print("[warn] Нет вакансий для top. Сделайте refresh или ai (новый поиск).")
+                            continue
+
+                        top_n = last_ai_want_n if last_ai_want_n else 5
+                        top_n = max(1, min(top_n, len(current)))
+
+                        print(f"\nТоп {top_n} вакансий (как на странице):\n")
+                        for i, v in enumerate(current[:top_n], 1):
+                            print(f"{i:>2}. {v.title}\n    {v.url}")
+                        print("")
+                        continue
+
+                    user_text = (await ainput(
+                        "AI> Сформулируйте заново (пример: 'Найди 3 вакансии Django в СПб, junior, удалёнка'): "
+                    )).strip()
+                    if not user_text:
+                        print("[info] Пусто — команда ai отменена.")
+                        continue
+
+                    parsed = ai_interpret_user_goal(user_text)
+
+                    query = parsed.query or query
+                    last_ai_want_n = parsed.want_n or last_ai_want_n
+
+                    area = parsed.area
+                    experience = parsed.experience
+                    remote = parsed.remote
+                    salary = parsed.salary
+                    only_with_salary = parsed.only_with_salary
+
+                    page_num = 0
+                    session_seen.clear()
+                    vacancies, in_tab = await run_search(
+                        page, query, page_num, area, experience, remote, salary, only_with_salary, http=http
+                    )
+                    vacancies = drop_seen_elsewhere(vacancies, session_seen, page_num)
+                    await prefetch_search(prefetcher, query, page_num + 1, area, experience, remote, salary, only_with_salary)
+
+                    print_active_filters(query, area, experience, remote, salary, only_with_salary)
+
+                    if vacancies:
+                        print_list(vacancies, page_num)
+                    else:
+                        print("[warn] По этому запросу не удалось собрать вакансии (возможно капча/верстка).")
+
+                else:
+                    print("[err] Неизвестная команда. Введите help.")
+
+            except PWTimeoutError:
+                print("[warn] Таймаут. Попробуйте refresh или повторите команду.")
+            except Exception as e:
+                print(f"[warn] Ошибка: {type(e).__name__}: {e}")
+
+        await cancel_prefetch(prefetcher)
+        if http is not None:
+            await http.aclose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # Браузер уже закрыт; поток ainput может держать stdin, и обычная
+        # финализация интерпретатора на нём падает — выходим сразу
+        sys.stdout.flush()
+        os._exit(130)
\ No newline at end of file